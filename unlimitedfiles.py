@@ -1,82 +1,229 @@
+import heapq
 import re
+import sys
 from collections import defaultdict
 
-def extract_data(text):
-    # Initialize dictionaries to store process and thread data
-    data = {}
-    process_names = {}
-    event_counts = {'THRECEIVE': {}, 'THCONDVAR': {}, 'THREPLY': {}, 'THSEM': {}, 'THMUTEX': {}, 'THNANOSLEEP': {}}
-    cpu_events = {}
-    thread_cpu_events = defaultdict(lambda: defaultdict(list))
-    thread_kernel_counts = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))  # New dictionary to store kernel call counts
-    thread_running_time = defaultdict(lambda: defaultdict(lambda: {'total': 0, 'msec': 0, 'cpu_usage': 0}))  # New dictionary to store running time
+STATE_EVENTS = ('THRECEIVE', 'THCONDVAR', 'THREPLY', 'THSEM', 'THMUTEX', 'THNANOSLEEP')
+STATE_FIELDS = tuple(event.lower() for event in STATE_EVENTS)  # ThreadRecord field holding the count of each event
+
+def parse_time(token):
+    # Convert a "t:<sec>.<msec>.<usec>us" token into microseconds, None if it is in another format
+    if not token.endswith('us'):
+        return None
+    try:
+        sec, msec, usec = token[2:-2].split('.')
+        return int(sec) * 1_000_000 + int(msec) * 1_000 + int(usec)
+    except ValueError:
+        return None
+
+class ThreadRecord:
+    # Results for one thread. With __slots__ each count is a plain field on the record,
+    # which keeps these small since a trace can contain hundreds of thousands of threads
+    __slots__ = ('name', 'kernel_counts', 'running_time') + STATE_FIELDS
+
+    def __init__(self, name="Unnamed Thread"):
+        self.name = name
+        self.threceive = self.thcondvar = self.threply = self.thsem = self.thmutex = self.thnanosleep = 0
+        self.kernel_counts = None  # Kernel call name -> count, only created once the thread makes a call
+        self.running_time = None  # Total running time in microseconds, None until the thread has stopped running once
+
+    @property
+    def state_counts(self):
+        # The counts in the order of STATE_EVENTS
+        return tuple(getattr(self, field) for field in STATE_FIELDS)
+
+    def running_time_msec(self):
+        return self.running_time / 1_000
+
+    def cpu_usage(self, cpu_count):
+        num_cpus = cpu_count * 10
+        return self.running_time_msec() / num_cpus if num_cpus else 0
+
+class TraceData:
+    # Results for one trace, with integer PIDs/TIDs and interned names
+    __slots__ = ('threads', 'process_names', 'cpu_events', 'attributed_cpu_events', 'cpu_state_counts', 'cpu_count')
+
+    def __init__(self):
+        self.threads = {}  # PID -> TID -> ThreadRecord
+        self.process_names = {}  # PID -> process name
+        self.cpu_events = {}  # Kernel call name -> CPU -> count, for all kernel calls
+        self.attributed_cpu_events = {}  # Kernel call name -> CPU -> count, for calls made by a known thread
+        self.cpu_state_counts = {}  # State event -> CPU -> count
+        self.cpu_count = 0
+
+def get_record(threads, pid, tid):
+    # Look up the record for a thread, creating it if the thread has not been seen yet
+    records = threads.setdefault(pid, {})
+    record = records.get(tid)
+    if record is None:
+        record = records[tid] = ThreadRecord()
+    return record
+
+def extract_data(text, processes=None, cpus=None, t_start=None, t_end=None):
+    # processes is an allowlist of PIDs and/or process names, cpus a set of CPU numbers and
+    # t_start/t_end a time window in microseconds. Lines outside of them are rejected with
+    # cheap string checks before any of the regular expressions below are run
+    if processes is not None:
+        processes = {str(process) for process in processes}
+        selected_pids = {process for process in processes if process.isdigit()}
+    if cpus is not None:
+        cpus = {int(cpu) for cpu in cpus}
+    check_time = t_start is not None or t_end is not None
+
+    def selected_name(name):
+        name = name.strip()
+        return name in processes or name.split('/')[-1] in processes
+
+    # Initialize the structures to store process and thread data
+    trace = TraceData()
+    threads = trace.threads
+    process_names = trace.process_names
+    cpu_events = trace.cpu_events
+    attributed_cpu_events = trace.attributed_cpu_events
+    cpu_state_counts = trace.cpu_state_counts
 
     # Variables to keep track of the current process and thread
-    current_pid = current_tid = current_name = None
-    last_running_thread = {}
-    running_start_times = defaultdict(lambda: defaultdict(int))
+    current_pid = current_record = current_name = None
+    pending_pid = None  # Header PID that is not selected yet, its name may follow on a later line
+    window_running = {} if t_start is not None else None  # CPU -> (pid, tid) running before t_start, until the window opens
+    last_running_thread = {}  # CPU -> ThreadRecord running on it
+    running_start_times = {}  # ThreadRecord -> timestamp it started running
     unique_cpus = set()
 
     # Process each line in the input text
     for line in text.split('\n'):
+        # Apply the filters before doing any regex work on the line. Whenever a line is dropped the
+        # current process and thread are cleared, so that pid-less continuation lines after it are
+        # not credited to whichever process was parsed before
+        cpu_field = None
+        before_window = False
+        if line.startswith('t:'):
+            pending_pid = None
+            fields = line.split(None, 2)
+            cpu_field = fields[1] if len(fields) > 1 and fields[1].startswith('CPU:') else None
+            if cpus is not None and cpu_field and cpu_field[4:].isdigit() and int(cpu_field[4:]) not in cpus:
+                current_pid = current_record = None
+                continue
+            timestamp = parse_time(fields[0]) if check_time else None
+            if timestamp is not None:  # Lines with a time in another format are let through
+                if t_end is not None and timestamp > t_end:
+                    break  # The trace is in time order so nothing after this is needed
+                if t_start is not None and timestamp < t_start:
+                    # Before the window only follow which thread is running on each CPU and read the name lines,
+                    # so the process names and the threads running when the window opens are still known
+                    if cpu_field and 'THRUNNING' in line:
+                        running_match = re.search(r'THREAD\s+:THRUNNING\s+pid:(\d+)\s+tid:(\d+)', line)
+                        if running_match:
+                            window_running[cpu_field[4:]] = running_match.groups()
+                    if 'name:' not in line:
+                        current_pid = current_record = None
+                        continue
+                    before_window = True
+                elif window_running is not None:
+                    # The window opens, the threads running at that moment start their running time at t_start
+                    for cpu_id, (pid, tid) in window_running.items():
+                        record = None
+                        if processes is None or pid in selected_pids:
+                            record = get_record(threads, int(pid), int(tid))
+                            running_start_times[record] = t_start
+                        last_running_thread[sys.intern(cpu_id)] = record
+                    window_running = None
+            if processes is not None and cpu_field and 'KER_CALL' in line and last_running_thread.get(cpu_field[4:]) is None:
+                current_pid = current_record = None
+                continue  # Kernel call made by a thread that is not selected
+        if processes is not None:
+            pid_index = line.find('pid:')
+            if pid_index != -1:
+                pid = line[pid_index + 4:].partition(' ')[0]
+                pending_pid = None
+                if pid not in selected_pids:
+                    # Process names are only known from the header lines, so select PIDs by name as they are found.
+                    # The name is either on the same line or on a later line before any tid:
+                    if 'tid:' not in line:
+                        name_index = line.find('name:')
+                        if name_index == -1:
+                            pending_pid = pid
+                        elif selected_name(line[name_index + 5:]):
+                            selected_pids.add(pid)
+                    if pid not in selected_pids:
+                        if cpu_field and 'THRUNNING' in line:
+                            last_running_thread[cpu_field[4:]] = None
+                        current_pid = current_record = None
+                        continue
+            elif pending_pid is not None:
+                # Continuation line of a header whose process is not selected yet
+                name_index = line.find('name:')
+                if 'tid:' not in line and name_index != -1 and selected_name(line[name_index + 5:]):
+                    selected_pids.add(pending_pid)
+                    current_pid = int(pending_pid)
+                    threads.setdefault(current_pid, {})
+                    current_record = None
+                    pending_pid = None
+                else:
+                    if 'tid:' in line or name_index != -1:
+                        pending_pid = None
+                    continue
+
         # Match the process ID in the line
         pid_match = re.search(r'pid:(\d+)', line)
         if pid_match:
-            current_pid = pid_match.group(1)
-            if current_pid not in data:
-                data[current_pid] = {}
-            current_tid = current_name = None
+            current_pid = int(pid_match.group(1))
+            if current_pid not in threads:
+                threads[current_pid] = {}
+            current_record = current_name = None
 
-        if current_pid:
+        if current_pid is not None:
             # Match the thread ID in the line
             tid_match = re.search(r'tid:(\d+)', line)
             if tid_match:
-                current_tid = tid_match.group(1)
-                if current_tid not in data[current_pid]:
-                    data[current_pid][current_tid] = "Unnamed Thread"
-                if current_pid not in thread_cpu_events:
-                    thread_cpu_events[current_pid] = {}
-                if current_tid not in thread_cpu_events[current_pid]:
-                    thread_cpu_events[current_pid][current_tid] = []
+                current_record = get_record(threads, current_pid, int(tid_match.group(1)))
 
             # Match the thread or process name in the line
             name_match = re.search(r'name:(.+)', line)
             if name_match:
-                current_name = name_match.group(1).strip()
-                if current_tid is None:
+                current_name = sys.intern(name_match.group(1).strip())
+                if current_record is None:
                     if current_pid not in process_names:
                         process_names[current_pid] = current_name
                 else:
-                    data[current_pid][current_tid] = current_name
+                    current_record.name = current_name
 
             # Match and count specific events in the line
-            counted_events = set()
-            for event in event_counts:
-                if event in line and current_tid and event not in counted_events:
-                    event_counts[event].setdefault(current_pid, {}).setdefault(current_tid, 0)
-                    event_counts[event][current_pid][current_tid] += 1
-                    counted_events.add(event)
+            if current_record is not None and not before_window:
+                for event, field in zip(STATE_EVENTS, STATE_FIELDS):
+                    if event in line:
+                        setattr(current_record, field, getattr(current_record, field) + 1)
+
+        # Name lines from before the time window are only read for the names
+        if before_window:
+            continue
 
         # Match the CPU ID in the line
         cpu_match = re.search(r'CPU:(\d+)', line)
         if cpu_match:
-            cpu_id = cpu_match.group(1)
+            cpu_id = sys.intern(cpu_match.group(1))
             unique_cpus.add(cpu_id)
+            if current_record is not None:
+                for event in STATE_EVENTS:
+                    if event in line:
+                        cpu_state_counts.setdefault(event, {}).setdefault(cpu_id, 0)
+                        cpu_state_counts[event][cpu_id] += 1
             thread_running_match = re.search(r'THREAD\s+:THRUNNING\s+pid:(\d+)\s+tid:(\d+)', line)
             if thread_running_match:
-                pid = thread_running_match.group(1)
-                tid = thread_running_match.group(2)
-                last_running_thread[cpu_id] = (pid, tid)
+                running_record = get_record(threads, int(thread_running_match.group(1)), int(thread_running_match.group(2)))
+                last_running_thread[cpu_id] = running_record
 
         # Match and count kernel events in the line
         event_match = re.search(r'KER_(CALL)\s+:(\S+)', line)
         if cpu_match and event_match:
-            cpu_id = cpu_match.group(1)
-            event_name = event_match.group(2).split()[0]
-            if cpu_id in last_running_thread:
-                pid, tid = last_running_thread[cpu_id]
-                thread_cpu_events[pid][tid].append((cpu_id, event_name))
-                thread_kernel_counts[pid][tid][event_name] += 1  # Update kernel call count
+            event_name = sys.intern(event_match.group(2).split()[0])
+            record = last_running_thread.get(cpu_id)
+            if record is not None:
+                attributed_cpu_events.setdefault(event_name, {}).setdefault(cpu_id, 0)
+                attributed_cpu_events[event_name][cpu_id] += 1
+                if record.kernel_counts is None:
+                    record.kernel_counts = {}
+                record.kernel_counts[event_name] = record.kernel_counts.get(event_name, 0) + 1  # Update kernel call count
 
             cpu_events.setdefault(event_name, {}).setdefault(cpu_id, 0)
             cpu_events[event_name][cpu_id] += 1
@@ -87,38 +234,91 @@ def extract_data(text):
             timestamp = int(time_match.group(1)) * 1_000_000 + int(time_match.group(2)) * 1_000 + int(time_match.group(3))
 
             if thread_running_match:
-                running_start_times[pid][tid] = timestamp
+                running_start_times[running_record] = timestamp
             else:
                 thread_match = re.search(r'pid:(\d+)\s+tid:(\d+)', line)
                 if thread_match:
-                    pid = thread_match.group(1)
-                    tid = thread_match.group(2)
-                    if tid in running_start_times[pid]:
-                        start_time = running_start_times[pid][tid]
-                        running_time = timestamp - start_time
-                        thread_running_time[pid][tid]['total'] += running_time
-                        thread_running_time[pid][tid]['msec'] = thread_running_time[pid][tid]['total'] / 1_000
-                        del running_start_times[pid][tid]
-
-    # Calculate CPU usage
-    num_cpus = len(unique_cpus) * 10  # Total number of unique CPUs
-    for pid, threads in thread_running_time.items():
-        for tid, times in threads.items():
-            times['cpu_usage'] = times['msec'] / num_cpus if num_cpus else 0
-
-    return data, process_names, event_counts, cpu_events, thread_cpu_events, thread_kernel_counts, thread_running_time
-
-def write_to_html(extracted_data_list, output_file, file_names):
-    total_cpu_events_list = []
-    for extracted_data in extracted_data_list:
-        total_cpu_events = defaultdict(lambda: defaultdict(int))
-        data, process_names, event_counts, cpu_events, thread_cpu_events, thread_kernel_counts, thread_running_time = extracted_data
-        for pid, threads in thread_cpu_events.items():
-            for tid, events in threads.items():
-                for cpu_id, event_name in events:
-                    total_cpu_events[event_name][cpu_id] += 1
-        total_cpu_events_list.append(total_cpu_events)
-
+                    record = threads.get(int(thread_match.group(1)), {}).get(int(thread_match.group(2)))
+                    if record in running_start_times:
+                        running_time = timestamp - running_start_times.pop(record)
+                        record.running_time = (record.running_time or 0) + running_time
+
+    # CPU usage is derived from the running time and the number of unique CPUs
+    trace.cpu_count = len(unique_cpus)
+
+    return trace
+
+def summarize_data(trace):
+    # Reduce one trace to per-thread and per-CPU totals keyed by name instead of PID/TID,
+    # since the IDs change between captures but the process and thread names do not.
+    # Repeated names get an ordinal (name#2, name#3, ...) in the order they appear, so
+    # separate processes or threads with the same name are not added together
+    thread_totals = defaultdict(lambda: defaultdict(int))
+    process_name_counts = defaultdict(int)
+    for pid, records in trace.threads.items():
+        process_name = trace.process_names.get(pid, f"pid:{pid}")
+        process_name_counts[process_name] += 1
+        if process_name_counts[process_name] > 1:
+            process_name = f"{process_name}#{process_name_counts[process_name]}"
+        thread_name_counts = defaultdict(int)
+        for tid, record in records.items():
+            thread_name_counts[record.name] += 1
+            thread_name = record.name if thread_name_counts[record.name] == 1 else f"{record.name}#{thread_name_counts[record.name]}"
+            totals = thread_totals[(process_name, thread_name)]
+            for event, count in zip(STATE_EVENTS, record.state_counts):
+                totals[event] += count
+            for event_name, count in (record.kernel_counts or {}).items():
+                totals[f"KER:{event_name}"] += count
+            totals['Running Time'] += record.running_time or 0
+
+    cpu_totals = defaultdict(lambda: defaultdict(int))
+    for event, cpus in trace.cpu_state_counts.items():
+        for cpu_id, count in cpus.items():
+            cpu_totals[cpu_id][event] += count
+    for event_name, cpus in trace.cpu_events.items():
+        for cpu_id, count in cpus.items():
+            cpu_totals[cpu_id][f"KER:{event_name}"] += count
+
+    # Drop the zero entries so only metrics that actually occurred are kept
+    return ({key: {metric: value for metric, value in totals.items() if value} for key, totals in thread_totals.items()},
+            {cpu_id: dict(totals) for cpu_id, totals in cpu_totals.items()})
+
+def compare_summaries(base_summary, summary, top_n=50):
+    # Diff two summarized traces. A CPU total is the sum over all of its threads and running time
+    # is in microseconds while the rest are counts, so thread counts, thread running time and CPU
+    # counts are ranked separately and each keeps its own top_n largest changes
+    def deltas(scope, base_items, items, running_time):
+        for key in base_items.keys() | items.keys():
+            base_metrics = base_items.get(key, {})
+            metrics = items.get(key, {})
+            for metric in base_metrics.keys() | metrics.keys():
+                if (metric == 'Running Time') != running_time:
+                    continue
+                old = base_metrics.get(metric, 0)
+                new = metrics.get(metric, 0)
+                if old != new:
+                    ratio = new / old if old else None
+                    yield scope, key, metric, old, new, new - old, ratio
+
+    def largest(scope, base_items, items, running_time):
+        # Ties are broken on the names so the same rows are picked on every run
+        rows = deltas(scope, base_items, items, running_time)
+        return heapq.nlargest(top_n, rows, key=lambda row: (abs(row[5]), str(row[1]), row[2]))
+
+    return {'Thread counts': largest('Thread', base_summary[0], summary[0], False),
+            'Thread running time': largest('Thread', base_summary[0], summary[0], True),
+            'CPU counts': largest('CPU', base_summary[1], summary[1], False)}
+
+def compare_data(summaries, top_n=50):
+    # Compare every trace against the first one. Only the baseline and the current summary
+    # are needed at a time, so summaries given by a generator are never all held together
+    summaries = iter(summaries)
+    base_summary = next(summaries, None)
+    if base_summary is None:
+        return []
+    return [compare_summaries(base_summary, summary, top_n) for summary in summaries]
+
+def write_to_html(traces, output_file, file_names, comparisons=None):
     with open(output_file, 'w', encoding='utf-8') as file:
         file.write("<html><head><title>Process Report</title>")
         file.write("<style>")
@@ -575,9 +775,11 @@ def write_to_html(extracted_data_list, output_file, file_names):
         file.write("Select file: <select id='fileSelect'>")
         for i, file_name in enumerate(file_names):
             file.write(f"<option value='file{i+1}'>{file_name}</option>")
+        if comparisons:
+            file.write("<option value='comparison'>Comparison</option>")
         file.write("</select>")
         file.write(f"<input type='hidden' id='fileCount' value='{len(file_names)}'>")
-        for i, (data, process_names, event_counts, cpu_events, thread_cpu_events, thread_kernel_counts, thread_running_time) in enumerate(extracted_data_list):
+        for i, trace in enumerate(traces):
             file_number = i + 1
             file.write(f"<div id='file{file_number}' class='file-container' style='display:none;'><h2>{file_names[i]}</h2>")
             file.write(f"View: <select id='viewSelect{file_number}' onchange='showTable(this.value, {file_number})'>")
@@ -588,7 +790,7 @@ def write_to_html(extracted_data_list, output_file, file_names):
             file.write("</select>")
             file.write(f"Select a process: <select id='processSelect{file_number}' onchange='filterByProcess({file_number})'>")
             file.write("<option value='all'>All Processes</option>")
-            for pid, pname in process_names.items():
+            for pid, pname in trace.process_names.items():
                 pname_display = pname.split('/')[-1].capitalize()  # Extract the name after the last "/" and capitalize it
                 file.write(f"<option value='{pid}'>{pname_display} (PID: {pid})</option>")
             file.write("</select>")
@@ -605,13 +807,13 @@ def write_to_html(extracted_data_list, output_file, file_names):
                 file.write(f"<th>{header} <button onclick=\"sortTable('{header}', 'asc', {file_number})\">&#9650;</button><button onclick=\"sortTable('{header}', 'desc', {file_number})\">&#9660;</button></th>")
             file.write("</tr>")
 
-            for pid, threads in data.items():
-                for tid, name in threads.items():
+            for pid, records in trace.threads.items():
+                for tid, record in records.items():
                     file.write(f"<tr data-pid='{pid}'>")
-                    file.write(f"<td>{name}</td>")
+                    file.write(f"<td>{record.name}</td>")
                     file.write(f"<td>{tid}</td>")
-                    for event in headers[2:]:
-                        file.write(f"<td>{event_counts[event].get(pid, {}).get(tid, 0)}</td>")
+                    for count in record.state_counts:
+                        file.write(f"<td>{count}</td>")
                     file.write("</tr>")
             
             file.write(f"<tr class='totals-row'><td colspan='2'><strong>Totals</strong></td>")
@@ -622,17 +824,20 @@ def write_to_html(extracted_data_list, output_file, file_names):
 
             # Adding the new kernel call count table
             file.write(f"<table id='kernelTable{file_number}' style='display: none;'><tr>")
-            kernel_headers = ["Thread Name", "Thread ID"] + sorted(set(k for pid in thread_kernel_counts for tid in thread_kernel_counts[pid] for k in thread_kernel_counts[pid][tid] if thread_kernel_counts[pid][tid][k] > 0))
+            kernel_headers = ["Thread Name", "Thread ID"] + sorted(trace.attributed_cpu_events)
             for header in kernel_headers:
                 file.write(f"<th>{header}</th>")
             file.write("</tr>")
-            for pid, threads in thread_kernel_counts.items():
-                for tid in sorted(threads.keys(), key=lambda x: int(x)):
+            for pid, records in trace.threads.items():
+                for tid in sorted(records):
+                    record = records[tid]
+                    if record.kernel_counts is None:
+                        continue
                     file.write(f"<tr data-pid='{pid}'>")
-                    file.write(f"<td>{data[pid][tid]}</td>")
+                    file.write(f"<td>{record.name}</td>")
                     file.write(f"<td>{tid}</td>")
                     for header in kernel_headers[2:]:
-                        file.write(f"<td data-header='{header}'>{threads[tid].get(header, 0)}</td>")
+                        file.write(f"<td data-header='{header}'>{record.kernel_counts.get(header, 0)}</td>")
                     file.write("</tr>")
             file.write("</table>")
 
@@ -645,14 +850,16 @@ def write_to_html(extracted_data_list, output_file, file_names):
                 else:
                     file.write(f"<th>{header}</th>")
             file.write("</tr>")
-            for pid, threads in thread_running_time.items():
-                for tid, times in threads.items():
+            for pid, records in trace.threads.items():
+                for tid, record in records.items():
+                    if record.running_time is None:
+                        continue
                     file.write(f"<tr data-pid='{pid}'>")
-                    file.write(f"<td>{data[pid][tid]}</td>")
+                    file.write(f"<td>{record.name}</td>")
                     file.write(f"<td>{tid}</td>")
-                    file.write(f"<td>{times['total']}</td>")
-                    file.write(f"<td>{times['msec']}</td>")
-                    file.write(f"<td>{times['cpu_usage']}</td>")
+                    file.write(f"<td>{record.running_time}</td>")
+                    file.write(f"<td>{record.running_time_msec()}</td>")
+                    file.write(f"<td>{record.cpu_usage(trace.cpu_count)}</td>")
                     file.write("</tr>")
             file.write("</table>")
 
@@ -660,11 +867,11 @@ def write_to_html(extracted_data_list, output_file, file_names):
             file.write(f"<div id='allProcessesSummary{file_number}' style='display: none;'>")
             file.write("<h2>Summary of CPU Events for All Processes</h2>")
             file.write("<table><tr><th>Event Name</th>")
-            cpu_headers = sorted(set(cpu_id for events in total_cpu_events_list[i].values() for cpu_id in events))
+            cpu_headers = sorted(set(cpu_id for events in trace.attributed_cpu_events.values() for cpu_id in events))
             for cpu_id in cpu_headers:
                 file.write(f"<th>CPU:{cpu_id}</th>")
             file.write("<th>Total</th></tr>")
-            for event_name, cpus in total_cpu_events_list[i].items():
+            for event_name, cpus in trace.attributed_cpu_events.items():
                 file.write(f"<tr><td>{event_name}</td>")
                 event_total = 0
                 for cpu_id in cpu_headers:
@@ -674,6 +881,20 @@ def write_to_html(extracted_data_list, output_file, file_names):
                 file.write(f"<td>{event_total}</td></tr>")
             file.write("</table>")
             file.write("</div></div>")
+
+        # Comparison of every trace against the first one, largest changes first
+        if comparisons:
+            file.write("<div id='comparison' class='file-container' style='display:none;'><h2>Comparison</h2>")
+            for i, comparison in enumerate(comparisons):
+                for group, rows in comparison.items():
+                    file.write(f"<h2>{file_names[0]} &rarr; {file_names[i+1]}: {group}</h2>")
+                    file.write("<table><tr><th>Scope</th><th>Name</th><th>Metric</th><th>Before</th><th>After</th><th>Delta</th><th>Ratio</th></tr>")
+                    for scope, key, metric, old, new, delta, ratio in rows:
+                        name = f"{key[0].split('/')[-1]} / {key[1]}" if scope == 'Thread' else f"CPU:{key}"
+                        ratio_display = f"{ratio:.2f}x" if ratio is not None else "new"
+                        file.write(f"<tr><td>{scope}</td><td>{name}</td><td>{metric}</td><td>{old}</td><td>{new}</td><td>{delta:+}</td><td>{ratio_display}</td></tr>")
+                    file.write("</table>")
+            file.write("</div>")
         file.write("</body></html>")
 
 def main():
@@ -686,17 +907,27 @@ def main():
         input_files.append(input_file)
     output_file = input("Please enter the name of the output HTML file: ")
 
-    # Read the input file content
-    texts = []
+    # Optional filters, leaving an answer empty keeps everything
+    processes = input("Only keep these PIDs or process names, separated by commas (leave empty for all): ")
+    processes = [process.strip() for process in processes.split(',') if process.strip()] or None
+    cpus = input("Only keep these CPUs, separated by commas (leave empty for all): ")
+    cpus = [int(cpu) for cpu in cpus.split(',') if cpu.strip()] or None
+    t_start = input("Start of the time window in microseconds (leave empty for the start of the trace): ").strip()
+    t_start = int(t_start) if t_start else None
+    t_end = input("End of the time window in microseconds (leave empty for the end of the trace): ").strip()
+    t_end = int(t_end) if t_end else None
+
+    # Read and extract one file at a time so only one raw text is held in memory
+    traces = []
     for input_file in input_files:
         with open(input_file, 'r') as file:
-            texts.append(file.read())
+            traces.append(extract_data(file.read(), processes, cpus, t_start, t_end))
 
-    # Extract the data from the text
-    extracted_data_list = [extract_data(text) for text in texts]
+    # Compare the traces against the first one, summarizing them one at a time
+    comparisons = compare_data(summarize_data(trace) for trace in traces)
     
     # Write the extracted data to the output HTML file
-    write_to_html(extracted_data_list, output_file, input_files)
+    write_to_html(traces, output_file, input_files, comparisons)
     print(f"Data has been written to {output_file}.")
 
 if __name__ == "__main__":